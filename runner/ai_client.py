@@ -1,19 +1,170 @@
 """AI provider clients for code review."""
 
-import json
+import asyncio
+import importlib.util
 from abc import ABC, abstractmethod
 
+from chunker import estimate_tokens
 from config import Config
+import json_compat
+from llm_cache import ImpactCache, ReviewCache, create_backend
+from rate_limit import create_rate_limiter
+from retry import with_retries
+
+# Provider SDKs are imported once here; each is only needed for its provider
+try:
+    from openai import OpenAI, AsyncOpenAI, DefaultHttpxClient, DefaultAsyncHttpxClient
+except ImportError:
+    OpenAI = AsyncOpenAI = DefaultHttpxClient = DefaultAsyncHttpxClient = None
+
+try:
+    import anthropic
+except ImportError:
+    anthropic = None
+
+try:
+    import httpx
+except ImportError:
+    httpx = None
+
+try:
+    import requests
+except ImportError:
+    requests = None
+
+# Keep-alive pool settings for the SDKs' HTTP clients; each client is reused
+# for every review and quick query, so connections (and TLS handshakes) are
+# shared. HTTP/2 needs the optional h2 package.
+if httpx is not None:
+    HTTP_CLIENT_OPTIONS = {
+        "limits": httpx.Limits(max_connections=64, max_keepalive_connections=32),
+        "http2": importlib.util.find_spec("h2") is not None,
+    }
+else:
+    HTTP_CLIENT_OPTIONS = {}
+
+# System instructions for lightweight impact-analysis queries
+QUICK_QUERY_INSTRUCTIONS = "You are a code analyst. Respond with valid JSON only, no markdown."
+
+# Shorter than a review, but room for a batch of several impact analyses
+QUICK_QUERY_MAX_TOKENS = 4096
+
+# Structured output schema for a single review; built once and shared by
+# every request
+REVIEW_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "inline_comments": {
+            "type": "array",
+            "items": {
+                "type": "object",
+                "properties": {
+                    "file": {"type": "string"},
+                    "line": {"type": "integer"},
+                    "severity": {"type": "string", "enum": ["info", "warning", "error", "critical"]},
+                    "message": {"type": "string"},
+                    "code_snippet": {"type": "string"}
+                },
+                "required": ["file", "line", "severity", "message", "code_snippet"],
+                "additionalProperties": False
+            }
+        },
+        "summary": {
+            "type": "object",
+            "properties": {
+                "overview": {"type": "string"},
+                "strengths": {"type": "array", "items": {"type": "string"}},
+                "issues": {"type": "array", "items": {"type": "string"}},
+                "suggestions": {"type": "array", "items": {"type": "string"}}
+            },
+            "required": ["overview", "strengths", "issues", "suggestions"],
+            "additionalProperties": False
+        }
+    },
+    "required": ["inline_comments", "summary"],
+    "additionalProperties": False
+}
+
+# Responses API text format for a single review
+REVIEW_FORMAT = {
+    "type": "json_schema",
+    "name": "code_review",
+    "strict": True,
+    "schema": REVIEW_SCHEMA,
+}
+
+# Anthropic tool whose input is the review; forcing it guarantees schema-valid JSON
+REVIEW_TOOL = {
+    "name": "code_review",
+    "description": "Submit the code review.",
+    "input_schema": REVIEW_SCHEMA,
+}
+
+
+def _parse_error_review() -> dict:
+    """Empty review returned when the model response isn't valid JSON."""
+    return {"inline_comments": [], "summary": {"overview": "Parse error", "strengths": [], "issues": [], "suggestions": []}}
 
 
 class AIClient(ABC):
     """Base class for AI clients."""
 
+    _async_client = None
+    _async_loop = None
+    rate_limiter = None
+
     @abstractmethod
     def review(self, system_prompt: str, user_message: str) -> dict:
         """Send review request and return parsed response."""
         pass
 
+    async def review_async(self, system_prompt: str, user_message: str) -> dict:
+        """
+        Async variant of review().
+        Subclasses override this with their provider's async SDK; the default
+        runs the blocking call in a worker thread.
+        """
+        return await asyncio.to_thread(self.review, system_prompt, user_message)
+
+    async def review_all(self, prompts: list[tuple[str, str]], max_concurrency: int = 8) -> list:
+        """
+        Review several (system_prompt, user_message) pairs concurrently, at
+        most max_concurrency at a time.
+        Results come back in input order. A failed request is returned as its
+        exception instead of raising, so one bad chunk doesn't kill the batch.
+        """
+        semaphore = asyncio.Semaphore(max_concurrency)
+
+        async def one(system_prompt: str, user_message: str) -> dict:
+            async with semaphore:
+                return await self.review_async(system_prompt, user_message)
+
+        return await asyncio.gather(
+            *(one(sp, um) for sp, um in prompts),
+            return_exceptions=True,
+        )
+
+    def _get_async_client(self):
+        """
+        Return the async HTTP/SDK client for the running event loop.
+        Async connection pools are bound to the loop that created them, so a
+        new client is created whenever the caller is on a different loop.
+        """
+        loop = asyncio.get_running_loop()
+        if self._async_client is None or self._async_loop is not loop:
+            self._async_client = self._create_async_client()
+            self._async_loop = loop
+        return self._async_client
+
+    async def _throttle(self, *texts: str) -> None:
+        """Wait for the provider rate limiter (if any) before an async request."""
+        if self.rate_limiter is not None:
+            await self.rate_limiter.acquire(sum(estimate_tokens(t) for t in texts))
+
+    def _create_async_client(self):
+        """Create the provider's async client."""
+        raise NotImplementedError("Subclass must implement _create_async_client")
+
     def quick_query(self, prompt: str) -> str:
         """
         Lightweight query for impact analysis.
@@ -22,68 +173,92 @@ class AIClient(ABC):
         """
         raise NotImplementedError("Subclass must implement quick_query")
 
+    async def quick_query_async(self, prompt: str) -> str:
+        """
+        Async variant of quick_query().
+        Unlike quick_query() it raises on API errors, leaving the fallback to
+        quick_query_many(); the default runs the blocking call in a worker thread.
+        """
+        return await asyncio.to_thread(self.quick_query, prompt)
+
+    async def quick_query_many(self, prompts: list[str], max_concurrency: int = 8) -> list[str]:
+        """
+        Run quick queries concurrently, at most max_concurrency at a time.
+        Transient errors are retried by the provider call; a query that still
+        fails yields "{}" so it doesn't sink the rest. Results are in input order.
+        """
+        semaphore = asyncio.Semaphore(max_concurrency)
+
+        async def one(prompt: str) -> str:
+            async with semaphore:
+                try:
+                    return await self.quick_query_async(prompt)
+                except Exception as e:
+                    print(f"Error in quick_query: {e}")
+                    return "{}"
+
+        return await asyncio.gather(*(one(p) for p in prompts))
+
 
 class OpenAIClient(AIClient):
     """OpenAI API client using Responses API for Codex models."""
 
     def __init__(self, config: Config, api_key: str):
-        from openai import OpenAI
-        self.client = OpenAI(api_key=api_key)
+        if OpenAI is None:
+            raise ImportError("openai package is required for the OpenAI provider")
+        # Retries are handled by with_retries, not the SDK
+        self.client = OpenAI(
+            api_key=api_key, max_retries=0, http_client=DefaultHttpxClient(**HTTP_CLIENT_OPTIONS)
+        )
+        self.api_key = api_key
         self.config = config
+        self.rate_limiter = create_rate_limiter(config.openai_rpm, config.openai_tpm)
 
-    def review(self, system_prompt: str, user_message: str) -> dict:
-        review_schema = {
-            "type": "object",
-            "properties": {
-                "inline_comments": {
-                    "type": "array",
-                    "items": {
-                        "type": "object",
-                        "properties": {
-                            "file": {"type": "string"},
-                            "line": {"type": "integer"},
-                            "severity": {"type": "string", "enum": ["info", "warning", "error", "critical"]},
-                            "message": {"type": "string"},
-                            "code_snippet": {"type": "string"}
-                        },
-                        "required": ["file", "line", "severity", "message", "code_snippet"],
-                        "additionalProperties": False
-                    }
-                },
-                "summary": {
-                    "type": "object",
-                    "properties": {
-                        "overview": {"type": "string"},
-                        "strengths": {"type": "array", "items": {"type": "string"}},
-                        "issues": {"type": "array", "items": {"type": "string"}},
-                        "suggestions": {"type": "array", "items": {"type": "string"}}
-                    },
-                    "required": ["overview", "strengths", "issues", "suggestions"],
-                    "additionalProperties": False
-                }
-            },
-            "required": ["inline_comments", "summary"],
-            "additionalProperties": False
+    def _create_async_client(self):
+        return AsyncOpenAI(
+            api_key=self.api_key, max_retries=0, http_client=DefaultAsyncHttpxClient(**HTTP_CLIENT_OPTIONS)
+        )
+
+    @with_retries
+    def _create_response(self, **kwargs):
+        """Responses API call, retried on transient errors."""
+        return self.client.responses.create(**kwargs)
+
+    @with_retries
+    async def _create_response_async(self, **kwargs):
+        """Async Responses API call, retried on transient errors."""
+        return await self._get_async_client().responses.create(**kwargs)
+
+    def _review_request(self, system_prompt: str, user_message: str) -> dict:
+        """Build the Responses API arguments for a review request."""
+        return {
+            "model": self.config.model,
+            "instructions": system_prompt,
+            "input": user_message,
+            "text": {"format": REVIEW_FORMAT},
         }
 
+    def review(self, system_prompt: str, user_message: str) -> dict:
         try:
-            response = self.client.responses.create(
-                model=self.config.model,
-                instructions=system_prompt,
-                input=user_message,
-                text={
-                    "format": {
-                        "type": "json_schema",
-                        "name": "code_review",
-                        "strict": True,
-                        "schema": review_schema
-                    }
-                }
+            response = self._create_response(**self._review_request(system_prompt, user_message))
+            return json_compat.loads(response.output_text)
+        except json_compat.JSONDecodeError as e:
+            print(f"Error parsing JSON response: {e}")
+            return _parse_error_review()
+        except Exception as e:
+            print(f"Error calling OpenAI API: {e}")
+            raise
+
+    async def review_async(self, system_prompt: str, user_message: str) -> dict:
+        await self._throttle(system_prompt, user_message)
+        try:
+            response = await self._create_response_async(
+                **self._review_request(system_prompt, user_message)
             )
-            return json.loads(response.output_text)
-        except json.JSONDecodeError as e:
+            return json_compat.loads(response.output_text)
+        except json_compat.JSONDecodeError as e:
             print(f"Error parsing JSON response: {e}")
-            return {"inline_comments": [], "summary": {"overview": "Parse error", "strengths": [], "issues": [], "suggestions": []}}
+            return _parse_error_review()
         except Exception as e:
             print(f"Error calling OpenAI API: {e}")
             raise
@@ -91,9 +266,9 @@ class OpenAIClient(AIClient):
     def quick_query(self, prompt: str) -> str:
         """Lightweight query for impact analysis."""
         try:
-            response = self.client.responses.create(
+            response = self._create_response(
                 model=self.config.model,
-                instructions="You are a code analyst. Respond with valid JSON only, no markdown.",
+                instructions=QUICK_QUERY_INSTRUCTIONS,
                 input=prompt,
             )
             return response.output_text
@@ -101,33 +276,88 @@ class OpenAIClient(AIClient):
             print(f"Error in quick_query: {e}")
             return "{}"
 
+    async def quick_query_async(self, prompt: str) -> str:
+        await self._throttle(prompt)
+        response = await self._create_response_async(
+            model=self.config.model,
+            instructions=QUICK_QUERY_INSTRUCTIONS,
+            input=prompt,
+        )
+        return response.output_text
+
 
 class AnthropicClient(AIClient):
     """Anthropic Claude API client."""
 
     def __init__(self, config: Config, api_key: str):
-        import anthropic
-        self.client = anthropic.Anthropic(api_key=api_key)
+        if anthropic is None:
+            raise ImportError("anthropic package is required for the Anthropic provider")
+        # Retries are handled by with_retries, not the SDK
+        self.client = anthropic.Anthropic(
+            api_key=api_key, max_retries=0, http_client=anthropic.DefaultHttpxClient(**HTTP_CLIENT_OPTIONS)
+        )
+        self.api_key = api_key
         self.config = config
+        self.rate_limiter = create_rate_limiter(config.anthropic_rpm, config.anthropic_tpm)
+
+    def _create_async_client(self):
+        return anthropic.AsyncAnthropic(
+            api_key=self.api_key, max_retries=0, http_client=anthropic.DefaultAsyncHttpxClient(**HTTP_CLIENT_OPTIONS)
+        )
+
+    @with_retries
+    def _create_message(self, **kwargs):
+        """Messages API call, retried on transient errors."""
+        return self.client.messages.create(**kwargs)
+
+    @with_retries
+    async def _create_message_async(self, **kwargs):
+        """Async Messages API call, retried on transient errors."""
+        return await self._get_async_client().messages.create(**kwargs)
+
+    def _review_request(self, system_prompt: str, user_message: str) -> dict:
+        """Build Messages API params that force a code_review tool call."""
+        return {
+            "model": self.config.model,
+            "max_tokens": self.config.max_tokens,
+            "system": system_prompt,
+            "messages": [{"role": "user", "content": user_message}],
+            "tools": [REVIEW_TOOL],
+            "tool_choice": {"type": "tool", "name": REVIEW_TOOL["name"]},
+        }
+
+    def _parse_review(self, message) -> dict:
+        """
+        Return the code_review tool input, which the SDK has already decoded.
+        A reply cut off at max_tokens can carry a partial tool input, so that
+        (or an input missing the review's fields) is treated as a parse error.
+        """
+        if message.stop_reason == "max_tokens":
+            print("Error parsing response: review was truncated at max_tokens")
+            return _parse_error_review()
+        for block in message.content:
+            if block.type == "tool_use":
+                review = block.input
+                if isinstance(review, dict) and "inline_comments" in review and "summary" in review:
+                    return review
+                print("Error parsing response: incomplete code_review tool input")
+                return _parse_error_review()
+        print("Error parsing response: no code_review tool call")
+        return _parse_error_review()
 
     def review(self, system_prompt: str, user_message: str) -> dict:
         try:
-            response = self.client.messages.create(
-                model=self.config.model,
-                max_tokens=self.config.max_tokens,
-                system=system_prompt,
-                messages=[{"role": "user", "content": user_message}]
-            )
-            content = response.content[0].text
-            # Try to extract JSON from response
-            if "```json" in content:
-                content = content.split("```json")[1].split("```")[0]
-            elif "```" in content:
-                content = content.split("```")[1].split("```")[0]
-            return json.loads(content)
-        except json.JSONDecodeError as e:
-            print(f"Error parsing JSON response: {e}")
-            return {"inline_comments": [], "summary": {"overview": "Parse error", "strengths": [], "issues": [], "suggestions": []}}
+            response = self._create_message(**self._review_request(system_prompt, user_message))
+            return self._parse_review(response)
+        except Exception as e:
+            print(f"Error calling Anthropic API: {e}")
+            raise
+
+    async def review_async(self, system_prompt: str, user_message: str) -> dict:
+        await self._throttle(system_prompt, user_message)
+        try:
+            response = await self._create_message_async(**self._review_request(system_prompt, user_message))
+            return self._parse_review(response)
         except Exception as e:
             print(f"Error calling Anthropic API: {e}")
             raise
@@ -135,10 +365,10 @@ class AnthropicClient(AIClient):
     def quick_query(self, prompt: str) -> str:
         """Lightweight query for impact analysis."""
         try:
-            response = self.client.messages.create(
+            response = self._create_message(
                 model=self.config.model,
-                max_tokens=1024,  # Shorter response for quick queries
-                system="You are a code analyst. Respond with valid JSON only, no markdown.",
+                max_tokens=QUICK_QUERY_MAX_TOKENS,
+                system=QUICK_QUERY_INSTRUCTIONS,
                 messages=[{"role": "user", "content": prompt}],
             )
             return response.content[0].text
@@ -146,71 +376,186 @@ class AnthropicClient(AIClient):
             print(f"Error in quick_query: {e}")
             return "{}"
 
+    async def quick_query_async(self, prompt: str) -> str:
+        await self._throttle(prompt)
+        response = await self._create_message_async(
+            model=self.config.model,
+            max_tokens=QUICK_QUERY_MAX_TOKENS,
+            system=QUICK_QUERY_INSTRUCTIONS,
+            messages=[{"role": "user", "content": prompt}],
+        )
+        return response.content[0].text
+
 
 class OllamaClient(AIClient):
     """Ollama local model client."""
 
     def __init__(self, config: Config):
-        import requests
+        if requests is None:
+            raise ImportError("requests package is required for the Ollama provider")
         self.config = config
         self.base_url = config.ollama_url
+        self.session = requests.Session()
+
+    def _create_async_client(self):
+        if httpx is None:
+            raise ImportError("httpx package is required for async Ollama requests")
+        # Local plain-HTTP server, so only the keep-alive limits apply
+        return httpx.AsyncClient(limits=HTTP_CLIENT_OPTIONS["limits"])
+
+    def _review_payload(self, system_prompt: str, user_message: str) -> dict:
+        """Build the /api/generate payload for a streamed review request."""
+        return {
+            "model": self.config.model,
+            "prompt": f"{system_prompt}\n\n{user_message}",
+            "stream": True,
+            "format": REVIEW_SCHEMA,  # Constrain output to the schema (Ollama >= 0.5)
+        }
+
+    @staticmethod
+    def _read_stream_line(line: str | bytes, parts: list[str]) -> bool:
+        """
+        Append one NDJSON stream line's text to parts.
+        Returns True on the final ("done") line.
+        """
+        if not line:
+            return False
+        chunk = json_compat.loads(line)
+        if chunk.get("error"):
+            raise RuntimeError(f"Ollama error: {chunk['error']}")
+        parts.append(chunk.get("response", ""))
+        return bool(chunk.get("done"))
+
+    @with_retries
+    def _generate(self, payload: dict, timeout: int) -> str:
+        """
+        Call /api/generate and return the generated text, retried on transient errors.
+        Streamed and single-body responses are both read as NDJSON lines, and
+        streaming makes the read timeout apply between tokens rather than to
+        the whole generation.
+        """
+        with self.session.post(
+            f"{self.base_url}/api/generate",
+            json=payload,
+            stream=True,
+            timeout=timeout,
+        ) as response:
+            response.raise_for_status()
+            parts: list[str] = []
+            for line in response.iter_lines():
+                if self._read_stream_line(line, parts):
+                    break
+        return "".join(parts)
+
+    @with_retries
+    async def _generate_async(self, payload: dict, timeout: int) -> str:
+        """Async variant of _generate()."""
+        async with self._get_async_client().stream(
+            "POST",
+            f"{self.base_url}/api/generate",
+            json=payload,
+            timeout=timeout,
+        ) as response:
+            response.raise_for_status()
+            parts: list[str] = []
+            async for line in response.aiter_lines():
+                if self._read_stream_line(line, parts):
+                    break
+        return "".join(parts)
 
     def review(self, system_prompt: str, user_message: str) -> dict:
-        import requests
         try:
-            response = requests.post(
-                f"{self.base_url}/api/generate",
-                json={
-                    "model": self.config.model,
-                    "prompt": f"{system_prompt}\n\n{user_message}",
-                    "stream": False,
-                    "format": "json"
-                },
-                timeout=300
-            )
-            response.raise_for_status()
-            content = response.json().get("response", "")
-            return json.loads(content)
-        except json.JSONDecodeError as e:
+            content = self._generate(self._review_payload(system_prompt, user_message), timeout=300)
+            return json_compat.loads(content)
+        except json_compat.JSONDecodeError as e:
             print(f"Error parsing JSON response: {e}")
-            return {"inline_comments": [], "summary": {"overview": "Parse error", "strengths": [], "issues": [], "suggestions": []}}
+            return _parse_error_review()
         except Exception as e:
             print(f"Error calling Ollama API: {e}")
             raise
 
+    async def review_async(self, system_prompt: str, user_message: str) -> dict:
+        try:
+            content = await self._generate_async(self._review_payload(system_prompt, user_message), timeout=300)
+            return json_compat.loads(content)
+        except json_compat.JSONDecodeError as e:
+            print(f"Error parsing JSON response: {e}")
+            return _parse_error_review()
+        except Exception as e:
+            print(f"Error calling Ollama API: {e}")
+            raise
+
+    def _quick_query_payload(self, prompt: str) -> dict:
+        """Build the /api/generate payload for a quick query."""
+        return {
+            "model": self.config.model,
+            "prompt": f"{QUICK_QUERY_INSTRUCTIONS}\n\n{prompt}",
+            "stream": False,
+            "format": "json",
+        }
+
     def quick_query(self, prompt: str) -> str:
         """Lightweight query for impact analysis."""
-        import requests
-
         try:
-            response = requests.post(
-                f"{self.base_url}/api/generate",
-                json={
-                    "model": self.config.model,
-                    "prompt": f"You are a code analyst. Respond with valid JSON only, no markdown.\n\n{prompt}",
-                    "stream": False,
-                    "format": "json",
-                },
-                timeout=60,
-            )
-            response.raise_for_status()
-            return response.json().get("response", "{}")
+            return self._generate(self._quick_query_payload(prompt), timeout=60) or "{}"
         except Exception as e:
             print(f"Error in quick_query: {e}")
             return "{}"
 
+    async def quick_query_async(self, prompt: str) -> str:
+        return await self._generate_async(self._quick_query_payload(prompt), timeout=60) or "{}"
+
+
+# Clients memoized per (config, api_key) so review and quick_query callers share one connection pool
+_clients: dict[tuple[int, str | None], AIClient] = {}
+
 
 def create_client(config: Config, api_key: str = None) -> AIClient:
-    """Factory function to create the appropriate AI client."""
+    """
+    Factory function to create the appropriate AI client.
+    Repeated calls with the same config and key return the same instance.
+    """
+    key = (id(config), api_key)
+    if key not in _clients:
+        _clients[key] = _build_client(config, api_key)
+    return _clients[key]
+
+
+def _build_client(config: Config, api_key: str = None) -> AIClient:
+    """Construct a new AI client for the configured provider."""
     if config.provider == "openai":
         if not api_key:
             raise ValueError("OPENAI_API_KEY required for OpenAI provider")
-        return OpenAIClient(config, api_key)
+        client = OpenAIClient(config, api_key)
     elif config.provider == "anthropic":
         if not api_key:
             raise ValueError("ANTHROPIC_API_KEY required for Anthropic provider")
-        return AnthropicClient(config, api_key)
+        client = AnthropicClient(config, api_key)
     elif config.provider == "ollama":
-        return OllamaClient(config)
+        client = OllamaClient(config)
     else:
         raise ValueError(f"Unknown provider: {config.provider}")
+
+    # Caches are opt-in: a hit replays an earlier response for an identical request
+    if config.cache_enabled or config.impact_cache_enabled:
+        backend = create_backend(config.cache_dir)
+    if config.cache_enabled:
+        cache = ReviewCache(
+            backend,
+            config.provider,
+            config.model,
+            cacheable=lambda result: result != _parse_error_review(),
+        )
+        cache.install(client)
+
+    # Impact analyses are cached per changed file on request
+    if config.impact_cache_enabled:
+        ImpactCache(
+            backend,
+            config.provider,
+            config.model,
+            ttl=config.impact_cache_ttl_secs,
+            cacheable=lambda entry: isinstance(entry, dict),
+        ).install(client)
+
+    return client
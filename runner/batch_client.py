@@ -0,0 +1,197 @@
+"""Batch API clients - Submit all review chunks as a single provider batch job."""
+
+import os
+import tempfile
+import time
+from abc import ABC, abstractmethod
+
+from config import Config
+import json_compat
+from retry import with_retries, with_unsubmitted_retries
+
+# Polling schedule while waiting for a batch to finish
+POLL_INITIAL_INTERVAL = 5.0
+POLL_MAX_INTERVAL = 60.0
+POLL_BACKOFF = 1.5
+POLL_MAX_WAIT = 24 * 3600  # Matches the providers' 24h completion window
+
+
+class BatchError(Exception):
+    """Raised when a batch job fails, expires, or a single request in it fails."""
+
+
+class BatchReviewClient(ABC):
+    """
+    Base class for batch review clients.
+    Batches are billed at a discount and avoid per-request HTTP overhead,
+    at the cost of latency: results can take minutes to hours.
+    """
+
+    def __init__(self, ai_client, config: Config):
+        self.ai = ai_client
+        self.client = ai_client.client
+        self.config = config
+
+    @abstractmethod
+    def submit_batch(self, prompts: list[tuple[str, str]]) -> str:
+        """Submit (system_prompt, user_message) pairs and return the batch ID."""
+        pass
+
+    @abstractmethod
+    def is_done(self, batch_id: str) -> bool:
+        """Check the batch status; raise BatchError if it can't complete."""
+        pass
+
+    @abstractmethod
+    def collect(self, batch_id: str) -> dict[str, dict | Exception]:
+        """Download results and map custom_id to a parsed review or error."""
+        pass
+
+    def wait(self, batch_id: str) -> None:
+        """Poll with exponential backoff until the batch has finished."""
+        interval = POLL_INITIAL_INTERVAL
+        deadline = time.monotonic() + POLL_MAX_WAIT
+        while not self.is_done(batch_id):
+            if time.monotonic() > deadline:
+                raise BatchError(f"Batch {batch_id} did not finish within {POLL_MAX_WAIT}s")
+            time.sleep(interval)
+            interval = min(interval * POLL_BACKOFF, POLL_MAX_INTERVAL)
+
+    def review_all(self, prompts: list[tuple[str, str]]) -> list:
+        """
+        Review all prompts in one batch.
+        Same contract as AIClient.review_all: results are index-aligned and
+        failed requests are returned as exceptions.
+        """
+        if not prompts:
+            return []
+        batch_id = self.submit_batch(prompts)
+        print(f"Submitted batch {batch_id} with {len(prompts)} request(s), waiting for results...")
+        self.wait(batch_id)
+        results = self.collect(batch_id)
+        return [
+            results.get(f"chunk-{i}", BatchError(f"No result for chunk-{i}"))
+            for i in range(len(prompts))
+        ]
+
+
+class OpenAIBatchClient(BatchReviewClient):
+    """OpenAI Batch API client (JSONL upload to /v1/responses)."""
+
+    def submit_batch(self, prompts: list[tuple[str, str]]) -> str:
+        with tempfile.NamedTemporaryFile("wb", suffix=".jsonl", delete=False) as f:
+            for i, (system_prompt, user_message) in enumerate(prompts):
+                f.write(json_compat.dumps({
+                    "custom_id": f"chunk-{i}",
+                    "method": "POST",
+                    "url": "/v1/responses",
+                    "body": self.ai._review_request(system_prompt, user_message),
+                }) + b"\n")
+            batch_file = f.name
+
+        try:
+            input_file_id = self._upload(batch_file)
+        finally:
+            os.unlink(batch_file)
+        return self._create(input_file_id)
+
+    @with_retries
+    def _upload(self, batch_file: str) -> str:
+        """Upload the JSONL input file; a resend at worst leaves an unused file."""
+        with open(batch_file, "rb") as f:
+            return self.client.files.create(file=f, purpose="batch").id
+
+    @with_unsubmitted_retries
+    def _create(self, input_file_id: str) -> str:
+        """Create the batch job; only resent if the provider never received it."""
+        batch = self.client.batches.create(
+            input_file_id=input_file_id,
+            endpoint="/v1/responses",
+            completion_window="24h",
+        )
+        return batch.id
+
+    @with_retries
+    def is_done(self, batch_id: str) -> bool:
+        status = self.client.batches.retrieve(batch_id).status
+        if status in ("failed", "expired", "cancelled"):
+            raise BatchError(f"Batch {batch_id} ended with status: {status}")
+        return status == "completed"
+
+    @with_retries
+    def collect(self, batch_id: str) -> dict[str, dict | Exception]:
+        batch = self.client.batches.retrieve(batch_id)
+        results: dict[str, dict | Exception] = {}
+        if not batch.output_file_id:
+            return results
+
+        content = self.client.files.content(batch.output_file_id).text
+        for line in content.splitlines():
+            if not line.strip():
+                continue
+            entry = json_compat.loads(line)
+            custom_id = entry.get("custom_id", "")
+            response = entry.get("response") or {}
+            if entry.get("error") or response.get("status_code") != 200:
+                results[custom_id] = BatchError(f"{custom_id} failed: {entry.get('error') or response}")
+                continue
+            try:
+                results[custom_id] = json_compat.loads(self._output_text(response.get("body", {})))
+            except json_compat.JSONDecodeError as e:
+                print(f"Error parsing JSON response for {custom_id}: {e}")
+                results[custom_id] = BatchError(f"{custom_id} returned invalid JSON")
+        return results
+
+    @staticmethod
+    def _output_text(body: dict) -> str:
+        """Concatenate output_text parts of a raw Responses API body."""
+        return "".join(
+            part.get("text", "")
+            for item in body.get("output", [])
+            if item.get("type") == "message"
+            for part in item.get("content", [])
+            if part.get("type") == "output_text"
+        )
+
+
+class AnthropicBatchClient(BatchReviewClient):
+    """Anthropic Message Batches API client."""
+
+    # Creating a batch isn't idempotent: a resend after the provider
+    # accepted it would bill a second batch that is never collected
+    @with_unsubmitted_retries
+    def submit_batch(self, prompts: list[tuple[str, str]]) -> str:
+        batch = self.client.messages.batches.create(
+            requests=[
+                {
+                    "custom_id": f"chunk-{i}",
+                    "params": self.ai._review_request(system_prompt, user_message),
+                }
+                for i, (system_prompt, user_message) in enumerate(prompts)
+            ]
+        )
+        return batch.id
+
+    @with_retries
+    def is_done(self, batch_id: str) -> bool:
+        return self.client.messages.batches.retrieve(batch_id).processing_status == "ended"
+
+    @with_retries
+    def collect(self, batch_id: str) -> dict[str, dict | Exception]:
+        results: dict[str, dict | Exception] = {}
+        for entry in self.client.messages.batches.results(batch_id):
+            if entry.result.type != "succeeded":
+                results[entry.custom_id] = BatchError(f"{entry.custom_id} {entry.result.type}")
+                continue
+            results[entry.custom_id] = self.ai._parse_review(entry.result.message)
+        return results
+
+
+def create_batch_client(ai_client, config: Config) -> BatchReviewClient:
+    """Factory function to create the batch client for the configured provider."""
+    if config.provider == "openai":
+        return OpenAIBatchClient(ai_client, config)
+    elif config.provider == "anthropic":
+        return AnthropicBatchClient(ai_client, config)
+    else:
+        raise ValueError(f"Batch mode is not supported for provider: {config.provider}")
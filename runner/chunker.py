@@ -9,8 +9,8 @@ def estimate_tokens(text: str) -> int:
 
 
 def estimate_file_tokens(diff_file: DiffFile) -> int:
-    """Estimate tokens for a single diff file."""
-    return estimate_tokens(diff_file.content)
+    """Tokens for a single diff file (counted once, on first use)."""
+    return diff_file.token_count
 
 
 def chunk_diff_files(
@@ -18,38 +18,42 @@ def chunk_diff_files(
     max_tokens: int = 80000,
     min_files_per_chunk: int = 1,
 ) -> list[list[DiffFile]]:
-    """Split diff files into chunks that fit within token limits."""
+    """
+    Split diff files into chunks that fit within token limits.
+    Uses first-fit-decreasing bin packing to minimize the number of chunks;
+    files keep their original diff order within and across chunks.
+    """
     if not diff_files:
         return []
 
-    chunks: list[list[DiffFile]] = []
-    current_chunk: list[DiffFile] = []
-    current_tokens = 0
-
     # Reserve some tokens for system prompt and response
     effective_max = int(max_tokens * 0.7)
 
-    for diff_file in diff_files:
-        file_tokens = estimate_file_tokens(diff_file)
+    # Largest files first, remembering each file's original position
+    sized = sorted(
+        ((estimate_file_tokens(f), i, f) for i, f in enumerate(diff_files)),
+        key=lambda t: -t[0],
+    )
 
-        # If single file exceeds limit, include it anyway
+    # Each bin is [used_tokens, [(index, file), ...], oversized]
+    bins: list[list] = []
+    for file_tokens, index, diff_file in sized:
+        # If single file exceeds limit, include it anyway in its own chunk
         if file_tokens > effective_max:
-            if current_chunk:
-                chunks.append(current_chunk)
-                current_chunk = []
-                current_tokens = 0
-            chunks.append([diff_file])
+            bins.append([file_tokens, [(index, diff_file)], True])
             continue
 
-        if current_tokens + file_tokens > effective_max and len(current_chunk) >= min_files_per_chunk:
-            chunks.append(current_chunk)
-            current_chunk = []
-            current_tokens = 0
-
-        current_chunk.append(diff_file)
-        current_tokens += file_tokens
-
-    if current_chunk:
-        chunks.append(current_chunk)
-
-    return chunks
+        for b in bins:
+            used, members, oversized = b
+            if oversized:
+                continue
+            if used + file_tokens <= effective_max or len(members) < min_files_per_chunk:
+                b[0] += file_tokens
+                members.append((index, diff_file))
+                break
+        else:
+            bins.append([file_tokens, [(index, diff_file)], False])
+
+    chunks = [sorted(members, key=lambda m: m[0]) for _, members, _ in bins]
+    chunks.sort(key=lambda members: members[0][0])
+    return [[f for _, f in members] for members in chunks]
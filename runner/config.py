@@ -1,10 +1,14 @@
 """Configuration loader."""
 
+import functools
 import os
 from dataclasses import dataclass, field
 from pathlib import Path
 import yaml
 
+# libyaml's C loader when PyYAML was built with it (the PyPI wheels are)
+YAML_LOADER = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+
 
 @dataclass
 class Config:
@@ -16,6 +20,18 @@ class Config:
     ollama_url: str = "http://localhost:11434"
     max_tokens: int = 16000
     temperature: float = 0.2
+    batch_mode: bool = False
+    ai_concurrency: int = 8
+
+    # Response cache
+    cache_enabled: bool = False
+    cache_dir: str = "/app/cache/llm"
+
+    # Provider rate limits for concurrent requests (0 = unlimited)
+    openai_rpm: int = 0
+    openai_tpm: int = 0
+    anthropic_rpm: int = 0
+    anthropic_tpm: int = 0
 
     # Gitea settings
     gitea_url: str = ""
@@ -35,10 +51,14 @@ class Config:
     impact_token_budget: int = 6000
     impact_max_files: int = 10
     impact_include_references: bool = True
+    impact_concurrency: int = 8
+    impact_cache_enabled: bool = False
+    impact_cache_ttl_secs: int = 7 * 86400
 
 
+@functools.lru_cache(maxsize=1)
 def load_config() -> Config:
-    """Load config from YAML files."""
+    """Load config from YAML files (parsed once per process)."""
     config_dir = Path("/app/config")
 
     # Load main config
@@ -46,13 +66,13 @@ def load_config() -> Config:
     data = {}
     if main_file.exists():
         with open(main_file) as f:
-            data = yaml.safe_load(f) or {}
+            data = yaml.load(f, Loader=YAML_LOADER) or {}
 
     # Apply custom overrides if mounted
     custom_file = config_dir / "custom.yml"
     if custom_file.exists():
         with open(custom_file) as f:
-            overrides = yaml.safe_load(f) or {}
+            overrides = yaml.load(f, Loader=YAML_LOADER) or {}
         data.update(overrides)
 
     # Validate required
@@ -1,7 +1,40 @@
 """Diff Parser - Parse unified diff format into structured data."""
 
+import io
 import re
 from dataclasses import dataclass, field
+from functools import cached_property, lru_cache
+
+try:
+    import tiktoken
+except ImportError:
+    tiktoken = None
+
+DIFF_HEADER_PATTERN = re.compile(r"^diff --git a/(.*) b/(.*)$")
+OLD_FILE_PATTERN = re.compile(r"^--- (?:a/)?(.*)$")
+NEW_FILE_PATTERN = re.compile(r"^\+\+\+ (?:b/)?(.*)$")
+HUNK_HEADER_PATTERN = re.compile(r"^@@ -(\d+)(?:,(\d+))? \+(\d+)(?:,(\d+))? @@")
+BINARY_PATTERN = re.compile(r"^Binary files .* differ$")
+
+
+@lru_cache(maxsize=1)
+def _get_encoding():
+    """Load the tiktoken encoding once; None if tiktoken or its data is unavailable."""
+    if tiktoken is None:
+        return None
+    try:
+        return tiktoken.get_encoding("cl100k_base")
+    except Exception as e:
+        print(f"Warning: tiktoken encoding unavailable ({e}), estimating tokens")
+        return None
+
+
+def count_tokens(text: str) -> int:
+    """Count tokens with tiktoken, falling back to ~4 chars per token."""
+    encoding = _get_encoding()
+    if encoding is None:
+        return len(text) // 4
+    return len(encoding.encode(text, disallowed_special=()))
 
 
 @dataclass
@@ -27,90 +60,100 @@ class DiffFile:
     hunks: list[DiffHunk] = field(default_factory=list)
     content: str = ""
 
+    @cached_property
+    def token_count(self) -> int:
+        """Token count of content, computed on first use so ignored files are never encoded."""
+        return count_tokens(self.content)
+
     def get_new_line_numbers(self) -> dict[int, str]:
         """Get a mapping of new file line numbers to their content."""
         line_map = {}
         for hunk in self.hunks:
             new_line = hunk.new_start
             for line in hunk.lines:
-                if line.startswith("+") and not line.startswith("+++"):
+                # File headers (+++/---) are consumed by parse_diff and never
+                # reach hunk.lines, so the first character is enough.
+                marker = line[:1]
+                if marker == "+" or marker == " ":
                     line_map[new_line] = line[1:]
                     new_line += 1
-                elif line.startswith("-") and not line.startswith("---"):
-                    pass  # Deleted lines don't increment new line counter
-                elif line.startswith(" ") or line == "":
-                    line_map[new_line] = line[1:] if line.startswith(" ") else ""
+                elif marker == "":
+                    line_map[new_line] = ""
                     new_line += 1
+                # "-" lines don't advance the new line counter and
+                # "\ No newline at end of file" markers aren't file lines
         return line_map
 
 
 def parse_diff(diff_content: str) -> list[DiffFile]:
-    """Parse a unified diff into a list of DiffFile objects."""
+    """
+    Parse a unified diff into a list of DiffFile objects.
+    Lines are streamed rather than split into a list up front, and each
+    file's content is taken as a single slice of the original string.
+    """
     files: list[DiffFile] = []
     current_file: DiffFile | None = None
     current_hunk: DiffHunk | None = None
-    current_file_content: list[str] = []
-
-    diff_header_pattern = re.compile(r"^diff --git a/(.*) b/(.*)$")
-    old_file_pattern = re.compile(r"^--- (?:a/)?(.*)$")
-    new_file_pattern = re.compile(r"^\+\+\+ (?:b/)?(.*)$")
-    hunk_header_pattern = re.compile(r"^@@ -(\d+)(?:,(\d+))? \+(\d+)(?:,(\d+))? @@")
-    binary_pattern = re.compile(r"^Binary files .* differ$")
-
-    lines = diff_content.split("\n")
-
-    for line in lines:
-        diff_match = diff_header_pattern.match(line)
-        if diff_match:
-            if current_file is not None:
-                current_file.content = "\n".join(current_file_content)
-                files.append(current_file)
-
-            current_file = DiffFile(
-                path=diff_match.group(2),
-                old_path=diff_match.group(1),
-            )
-            current_file_content = [line]
-            current_hunk = None
-            continue
+    current_file_start = 0
+    offset = 0
+
+    for raw_line in io.StringIO(diff_content):
+        line_start = offset
+        offset += len(raw_line)
+        line = raw_line[:-1] if raw_line.endswith("\n") else raw_line
+
+        # Dispatch on the first character so content lines (the common
+        # case) skip the header regexes entirely
+        marker = line[:1]
+
+        if marker == "d" and line.startswith("diff --git"):
+            diff_match = DIFF_HEADER_PATTERN.match(line)
+            if diff_match:
+                if current_file is not None:
+                    # Content runs up to (not including) the newline before this header
+                    current_file.content = diff_content[current_file_start:line_start - 1]
+                    files.append(current_file)
+
+                current_file = DiffFile(
+                    path=diff_match.group(2),
+                    old_path=diff_match.group(1),
+                )
+                current_file_start = line_start
+                current_hunk = None
+                continue
 
         if current_file is None:
             continue
 
-        current_file_content.append(line)
-
-        if binary_pattern.match(line):
-            current_file.is_binary = True
-            continue
-
-        old_match = old_file_pattern.match(line)
-        if old_match:
-            if old_match.group(1) == "/dev/null":
+        if marker == "@":
+            hunk_match = HUNK_HEADER_PATTERN.match(line)
+            if hunk_match:
+                old_start, old_count, new_start, new_count = hunk_match.groups()
+                current_hunk = DiffHunk(
+                    old_start=int(old_start),
+                    old_count=int(old_count or 1),
+                    new_start=int(new_start),
+                    new_count=int(new_count or 1),
+                )
+                current_file.hunks.append(current_hunk)
+                continue
+        elif marker == "-" and line.startswith("--- "):
+            if OLD_FILE_PATTERN.match(line).group(1) == "/dev/null":
                 current_file.is_new = True
             continue
-
-        new_match = new_file_pattern.match(line)
-        if new_match:
-            if new_match.group(1) == "/dev/null":
+        elif marker == "+" and line.startswith("+++ "):
+            if NEW_FILE_PATTERN.match(line).group(1) == "/dev/null":
                 current_file.is_deleted = True
             continue
-
-        hunk_match = hunk_header_pattern.match(line)
-        if hunk_match:
-            current_hunk = DiffHunk(
-                old_start=int(hunk_match.group(1)),
-                old_count=int(hunk_match.group(2) or 1),
-                new_start=int(hunk_match.group(3)),
-                new_count=int(hunk_match.group(4) or 1),
-            )
-            current_file.hunks.append(current_hunk)
+        elif marker == "B" and BINARY_PATTERN.match(line):
+            current_file.is_binary = True
             continue
 
         if current_hunk is not None:
             current_hunk.lines.append(line)
 
     if current_file is not None:
-        current_file.content = "\n".join(current_file_content)
+        current_file.content = diff_content[current_file_start:]
         files.append(current_file)
 
     return files
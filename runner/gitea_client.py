@@ -1,7 +1,11 @@
 """Gitea API client for posting review comments."""
 
 import requests
+from requests.adapters import HTTPAdapter
+
 from config import Config
+import json_compat
+from retry import NOT_PROCESSED_STATUS_CODES, with_retries, with_unsent_retries
 
 
 class GiteaClient:
@@ -15,12 +19,33 @@ class GiteaClient:
             "Content-Type": "application/json",
         }
 
+        # Reuse one pooled session so every API call skips the TCP/TLS handshake.
+        # Retries are handled by the with_retries decorators, not the adapter.
+        self.session = requests.Session()
+        self.session.headers.update(self.headers)
+        adapter = HTTPAdapter(pool_connections=10, pool_maxsize=20)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+    @with_retries
     def _get_pr_head_sha(self, repo_name: str, pr_number: int) -> str:
         """Get the head commit SHA for a PR."""
         url = f"{self.config.gitea_url}/api/v1/repos/{repo_name}/pulls/{pr_number}"
-        response = requests.get(url, headers=self.headers)
+        response = self.session.get(url)
         response.raise_for_status()
-        return response.json().get("head", {}).get("sha", "")
+        return json_compat.loads(response.content).get("head", {}).get("sha", "")
+
+    @with_unsent_retries
+    def _post(self, url: str, payload: dict) -> requests.Response:
+        """
+        POST a JSON payload. Reviews and comments aren't idempotent, so this is
+        only retried when the request never reached Gitea or was refused
+        (429/503); a 5xx after the server may have stored it is not resent.
+        """
+        response = self.session.post(url, data=json_compat.dumps(payload))
+        if response.status_code in NOT_PROCESSED_STATUS_CODES:
+            response.raise_for_status()
+        return response
 
     def post_review(
         self,
@@ -40,39 +65,43 @@ class GiteaClient:
             "critical": "🔴", "error": "🟠", "warning": "🟡", "info": "🔵"
         }
 
+        # Single pass: format inline comments and group messages by severity
+        formatted = []
+        by_severity = {"critical": [], "error": [], "warning": [], "info": []}
+        for c in comments:
+            sev = c.get("severity", "info")
+            message = c.get("message", "")
+            by_severity.setdefault(sev, []).append(message)
+            icon = icons.get(sev, "💬")
+
+            # Build comment body with optional code snippet
+            body_text = f"{icon} **{sev.upper()}**: {message}"
+            code_snippet = c.get("code_snippet")
+            if code_snippet:
+                body_text += f"\n\n**Code:**\n```\n{code_snippet}\n```"
+
+            formatted.append({
+                "body": body_text,
+                "path": c.get("file", ""),
+                "new_position": c.get("line", 1),
+            })
+
         # Post inline comments as a review
         if comments:
-            formatted = []
-            severity_counts = {"critical": 0, "error": 0, "warning": 0, "info": 0}
-
-            for c in comments:
-                sev = c.get("severity", "info")
-                severity_counts[sev] = severity_counts.get(sev, 0) + 1
-                icon = icons.get(sev, "💬")
-
-                # Build comment body with optional code snippet
-                body_text = f"{icon} **{sev.upper()}**: {c.get('message', '')}"
-                if c.get("code_snippet"):
-                    body_text += f"\n\n**Code:**\n```\n{c.get('code_snippet')}\n```"
-
-                formatted.append({
-                    "body": body_text,
-                    "path": c.get("file", ""),
-                    "new_position": c.get("line", 1),
-                })
-
             # Build review body
-            body = f"{self.config.bot_emoji} **{self.config.bot_name} - Inline Comments**\n\n"
-            body += f"Found **{len(comments)}** item(s):\n"
+            parts = [f"{self.config.bot_emoji} **{self.config.bot_name} - Inline Comments**\n\n"]
+            parts.append(f"Found **{len(comments)}** item(s):\n")
             for sev, icon in icons.items():
-                if severity_counts.get(sev, 0) > 0:
-                    body += f"- {icon} {sev.title()}: {severity_counts[sev]}\n"
+                if by_severity.get(sev):
+                    parts.append(f"- {icon} {sev.title()}: {len(by_severity[sev])}\n")
+
+            body = "".join(parts)
 
             url = f"{self.config.gitea_url}/api/v1/repos/{repo_name}/pulls/{pr_number}/reviews"
             payload = {"body": body, "commit_id": head_sha, "comments": formatted}
 
             try:
-                response = requests.post(url, headers=self.headers, json=payload)
+                response = self._post(url, payload)
                 if response.status_code in (200, 201):
                     print(f"Posted review with {len(comments)} inline comments")
                 else:
@@ -93,93 +122,90 @@ class GiteaClient:
                 combined["issues"].extend(s.get("issues", []))
                 combined["suggestions"].extend(s.get("suggestions", []))
 
-            body = f"## {self.config.bot_emoji} {self.config.bot_name} Summary\n\n"
+            parts = [f"## {self.config.bot_emoji} {self.config.bot_name} Summary\n\n"]
 
             # Narrative overview
             if combined["overview"]:
-                body += f"{combined['overview']}\n\n"
+                parts.append(f"{combined['overview']}\n\n")
 
             # Impact Analysis section (contextual impacts)
             if impact_context and impact_context.impacts:
-                body += "### 🔍 Impact Analysis\n\n"
-                body += "The following contextual impacts were identified:\n\n"
+                parts.append("### 🔍 Impact Analysis\n\n")
+                parts.append("The following contextual impacts were identified:\n\n")
 
                 for impact in impact_context.impacts[:5]:
-                    body += f"**{impact.file_path}**"
+                    parts.append(f"**{impact.file_path}**")
                     if impact.change_summary:
-                        body += f" — {impact.change_summary}"
-                    body += "\n"
+                        parts.append(f" — {impact.change_summary}")
+                    parts.append("\n")
 
                     # Include the actual code that changed
                     if getattr(impact, "code_context", None):
-                        body += f"```\n{impact.code_context}\n```\n"
+                        parts.append(f"```\n{impact.code_context}\n```\n")
 
                     if impact.potential_impacts:
                         for pi in impact.potential_impacts[:3]:
-                            body += f"  - {pi}\n"
+                            parts.append(f"  - {pi}\n")
 
                     if impact.review_focus:
-                        body += f"  - *Verify:* {impact.review_focus[0]}\n"
+                        parts.append(f"  - *Verify:* {impact.review_focus[0]}\n")
 
-                    body += "\n"
+                    parts.append("\n")
 
                 if impact_context.critical_files:
                     files_list = ", ".join(f"`{f}`" for f in impact_context.critical_files[:5])
-                    body += f"**Files requiring attention:** {files_list}\n\n"
+                    parts.append(f"**Files requiring attention:** {files_list}\n\n")
 
             # Findings narrative
             if combined["issues"] or comments:
-                body += "### 📋 Findings\n\n"
+                parts.append("### 📋 Findings\n\n")
                 if comments:
-                    # Group by severity for narrative
-                    by_severity = {"critical": [], "error": [], "warning": [], "info": []}
-                    for c in comments:
-                        sev = c.get("severity", "info")
-                        by_severity.setdefault(sev, []).append(c)
-
                     if by_severity["critical"]:
-                        body += f"**Critical issues ({len(by_severity['critical'])}):** "
-                        body += "These must be addressed before merging. "
-                        body += "; ".join(c.get("message", "")[:80] + "..." if len(c.get("message", "")) > 80 else c.get("message", "") for c in by_severity["critical"][:2])
-                        body += "\n\n"
+                        parts.append(f"**Critical issues ({len(by_severity['critical'])}):** ")
+                        parts.append("These must be addressed before merging. ")
+                        parts.append("; ".join(
+                            m[:80] + "..." if len(m) > 80 else m for m in by_severity["critical"][:2]
+                        ))
+                        parts.append("\n\n")
 
                     if by_severity["error"]:
-                        body += f"**Errors ({len(by_severity['error'])}):** "
-                        body += "Bugs or incorrect behavior that need fixing. "
-                        body += "See inline comments for details.\n\n"
+                        parts.append(f"**Errors ({len(by_severity['error'])}):** ")
+                        parts.append("Bugs or incorrect behavior that need fixing. ")
+                        parts.append("See inline comments for details.\n\n")
 
                     if by_severity["warning"]:
-                        body += f"**Warnings ({len(by_severity['warning'])}):** "
-                        body += "Potential issues worth reviewing. "
-                        body += "These won't block the PR but should be considered.\n\n"
+                        parts.append(f"**Warnings ({len(by_severity['warning'])}):** ")
+                        parts.append("Potential issues worth reviewing. ")
+                        parts.append("These won't block the PR but should be considered.\n\n")
 
                     if by_severity["info"]:
-                        body += f"**Suggestions ({len(by_severity['info'])}):** "
-                        body += "Minor improvements and optimizations identified.\n\n"
+                        parts.append(f"**Suggestions ({len(by_severity['info'])}):** ")
+                        parts.append("Minor improvements and optimizations identified.\n\n")
 
                 elif combined["issues"]:
                     for i in combined["issues"][:5]:
-                        body += f"- {i}\n"
-                    body += "\n"
+                        parts.append(f"- {i}\n")
+                    parts.append("\n")
 
             # Strengths (keep brief)
             if combined["strengths"]:
-                body += "### ✅ What's Good\n\n"
-                body += " ".join(combined["strengths"][:3])
-                body += "\n\n"
+                parts.append("### ✅ What's Good\n\n")
+                parts.append(" ".join(combined["strengths"][:3]))
+                parts.append("\n\n")
 
             # Actionable suggestions
             if combined["suggestions"]:
-                body += "### 💡 Recommendations\n\n"
+                parts.append("### 💡 Recommendations\n\n")
                 for s in combined["suggestions"][:3]:
-                    body += f"- {s}\n"
-                body += "\n"
+                    parts.append(f"- {s}\n")
+                parts.append("\n")
 
-            body += "---\n*Generated by AI. Please review findings and use your judgment.*"
+            parts.append("---\n*Generated by AI. Please review findings and use your judgment.*")
+            body = "".join(parts)
 
             url = f"{self.config.gitea_url}/api/v1/repos/{repo_name}/issues/{pr_number}/comments"
             try:
-                response = requests.post(url, headers=self.headers, json={"body": body})
+                response = self._post(url, {"body": body})
                 if response.status_code in (200, 201):
                     print("Posted summary comment")
                 else:
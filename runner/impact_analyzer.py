@@ -1,12 +1,19 @@
 """Impact Analyzer - Analyze potential impacts of code changes."""
 
-import json
+import asyncio
+import io
 import os
+from collections import Counter
+from collections.abc import Iterable
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
 import re
-import subprocess
 from dataclasses import dataclass, field
+from functools import cached_property
 from pathlib import Path
 
+import json_compat
+
 
 @dataclass
 class ChangeImpact:
@@ -20,6 +27,20 @@ class ChangeImpact:
     review_focus: list[str] = field(default_factory=list)  # What the reviewer should check
     related_files: list[str] = field(default_factory=list)  # Files that reference or are referenced
 
+    @cached_property
+    def token_estimate(self) -> int:
+        """
+        Approximate prompt tokens for this impact's text, computed once.
+        Tolerates non-string values, like the str(impact) estimate it replaces.
+        """
+        chars = sum(len(str(text or "")) for text in (self.file_path, self.change_summary, self.code_context))
+        for items in (self.affected_areas, self.potential_impacts, self.review_focus, self.related_files):
+            if isinstance(items, list):
+                chars += sum(len(str(item)) for item in items)
+            elif items:
+                chars += len(str(items))
+        return chars >> 2
+
 
 @dataclass
 class ImpactContext:
@@ -32,34 +53,31 @@ class ImpactContext:
     token_estimate: int = 0
 
 
-# Prompt for AI impact analysis
-IMPACT_ANALYSIS_PROMPT = """Analyze the potential impact of this change on the project.
+# Prompt for AI impact analysis of a group of changed files
+IMPACT_ANALYSIS_PROMPT = """Analyze the potential impact of these {count} change(s) on the project.
 
-**File:** {file_path}
-**Change type:** {change_type}
+{changes}
 
-**The specific changes:**
-```diff
-{diff_content}
-```
-
-**Files that reference this file:**
-{referencing_files}
-
-Analyze and return JSON (no markdown code fences):
+Analyze each change and return JSON (no markdown code fences) with exactly
+one entry per change:
 {{
-    "change_summary": "Brief description of what changed",
-    "code_context": "The 1-3 key lines of code that were added/modified (from the diff, without +/- prefixes)",
-    "affected_areas": ["List of functionality/features affected"],
-    "potential_impacts": [
-        "Impact 1: How this might affect other parts",
-        "Impact 2: What could break or behave differently"
-    ],
-    "review_focus": [
-        "Specific thing reviewer should verify",
-        "Another thing to check"
-    ],
-    "critical_files": ["files/that/need/review.py"]
+    "impacts": [
+        {{
+            "file": "The change's **File:** path, exactly as given",
+            "change_summary": "Brief description of what changed",
+            "code_context": "The 1-3 key lines of code that were added/modified (from the diff, without +/- prefixes)",
+            "affected_areas": ["List of functionality/features affected"],
+            "potential_impacts": [
+                "Impact 1: How this might affect other parts",
+                "Impact 2: What could break or behave differently"
+            ],
+            "review_focus": [
+                "Specific thing reviewer should verify",
+                "Another thing to check"
+            ],
+            "critical_files": ["files/that/need/review.py"]
+        }}
+    ]
 }}
 
 For code_context: Extract the most important 1-3 lines that show the actual change. For example:
@@ -73,75 +91,167 @@ Be specific and actionable. Focus on:
 - Side effects on dependent code
 - Configuration or environment changes needed"""
 
+# One changed file within IMPACT_ANALYSIS_PROMPT, after its "### Change N"
+# heading; also the key its analysis is cached under
+IMPACT_CHANGE_SECTION = """**File:** {file_path}
+**Change type:** {change_type}
+
+**The specific changes:**
+```diff
+{diff_content}
+```
+
+**Files that reference this file:**
+{referencing_files}"""
+
+# JSON object inside a markdown code fence, with or without a json tag
+CODE_FENCE_PATTERN = re.compile(r"```(?:json)?\s*(\{.*?\})\s*```", re.DOTALL)
+
+# Changed files analyzed per AI call; keeps each prompt well under context limits
+IMPACT_BATCH_SIZE = 4
+
 
-def estimate_tokens(text: str) -> int:
+def estimate_tokens(text: str | bytes) -> int:
     """Estimate token count (rough approximation: ~4 chars per token)."""
-    return len(text) // 4
+    return len(text) >> 2
 
 
-def find_references(file_path: str, repo_root: str) -> list[str]:
+# Directories never worth scanning for references
+SKIP_DIRS = {".git", "node_modules", "__pycache__", ".venv", "venv", ".terraform"}
+
+# Binary file types that can't contain a textual reference
+BINARY_EXTENSIONS = {
+    ".png", ".jpg", ".jpeg", ".gif", ".ico", ".webp", ".bmp", ".pdf",
+    ".zip", ".gz", ".tgz", ".bz2", ".xz", ".tar", ".7z", ".jar", ".whl",
+    ".so", ".dll", ".dylib", ".exe", ".bin", ".o", ".a", ".pyc", ".class",
+    ".woff", ".woff2", ".ttf", ".otf", ".eot", ".mp3", ".mp4", ".mov", ".sqlite", ".db",
+}
+
+# Changed files that nothing realistically references: docs, lockfiles,
+# images, and generated/minified assets
+NO_REFERRER_SUFFIXES = (".md", ".lock", ".png", ".jpg", ".jpeg", ".gif", ".svg", ".min.js", ".min.css", ".map")
+LOCKFILE_PATTERN = re.compile(r"-lock\.[^/]+$")
+
+# Files that can reference a Dockerfile / compose file: CI workflows,
+# Makefiles, compose files (and, for compose, any YAML)
+DOCKERFILE_REFERRERS = re.compile(r"\.gitea/|\.github/|(?:.*/)?(?:Makefile|docker-compose[^/]*\.ya?ml)$")
+COMPOSE_REFERRERS = re.compile(r"\.gitea/|\.github/|(?:.*/)?Makefile$|.*\.ya?ml$")
+
+# Larger files are skipped by the reference scan
+SCAN_MAX_FILE_BYTES = 512 * 1024
+
+
+def iter_repo_files(repo_root: str):
+    """Yield (relative path, full path) for each scannable file, pruning skipped dirs."""
+    for dirpath, dirnames, filenames in os.walk(repo_root):
+        dirnames[:] = [d for d in dirnames if d not in SKIP_DIRS]
+        for name in filenames:
+            if os.path.splitext(name)[1].lower() in BINARY_EXTENSIONS:
+                continue
+            full_path = os.path.join(dirpath, name)
+            yield os.path.relpath(full_path, repo_root), full_path
+
+
+def reference_pattern(file_path: str) -> re.Pattern:
     """
-    Find files that reference the given file.
-    Uses multiple strategies based on file type.
+    Build one regex matching any way another file may reference file_path.
+    Uses multiple strategies based on file type, merged so that no
+    alternative is a duplicate of, or subsumed by, another.
     """
-    references = set()
     path = Path(file_path)
-    filename = path.name
-    stem = path.stem
+    filename = re.escape(path.name)
+    stem = re.escape(path.stem)
 
-    def grep_for_pattern(pattern: str) -> set[str]:
-        """Run grep and return matching file paths."""
-        try:
-            result = subprocess.run(
-                ["grep", "-rl", "--include=*", pattern, repo_root],
-                capture_output=True,
-                text=True,
-                timeout=30,
-            )
-            if result.returncode == 0:
-                return {
-                    line.strip()
-                    for line in result.stdout.strip().split("\n")
-                    if line.strip() and not line.strip().endswith(".git")
-                }
-        except (subprocess.TimeoutExpired, Exception):
-            pass
-        return set()
-
-    # Strategy 1: Grep for filename/path
-    references.update(grep_for_pattern(f'"{filename}"'))
-    references.update(grep_for_pattern(f"'{filename}'"))
-    references.update(grep_for_pattern(file_path))
+    # Strategy 1: Filename/path (for a top-level file the bare path
+    # already matches the quoted filename)
+    patterns = [re.escape(file_path)]
+    if path.name != file_path:
+        patterns.append(f"[\"']{filename}[\"']")
 
     # Strategy 2: For code files, search for import patterns
     if file_path.endswith(".py"):
         # Python imports: "from module import" or "import module"
-        references.update(grep_for_pattern(f"import {stem}"))
-        references.update(grep_for_pattern(f"from {stem}"))
+        patterns.append(f"(?:import|from) {stem}(?!\\w)")
 
     # Strategy 3: For config files, search in common include patterns
     if file_path.endswith((".yml", ".yaml")):
-        references.update(grep_for_pattern(f"include.*{filename}"))
-        references.update(grep_for_pattern(f"import.*{filename}"))
+        patterns.append(f"(?:include|import).*{filename}")
 
     # Strategy 4: For Terraform files
     if file_path.endswith(".tf"):
-        references.update(grep_for_pattern(f"module.*{stem}"))
-        references.update(grep_for_pattern(f"source.*{stem}"))
+        patterns.append(f"(?:module|source).*{stem}")
+
+    # Strategy 5: For Docker files (searched only in reference_scope() files)
+    if path.name == "Dockerfile":
+        patterns = [filename]  # Subsumes the path and quoted forms
+    elif file_path.endswith("docker-compose.yml"):
+        patterns.append("docker-compose")
+
+    return re.compile("|".join(patterns).encode())
+
+
+def needs_reference_search(file_path: str) -> bool:
+    """False for changed files nothing realistically references (docs, lockfiles, assets)."""
+    return not (file_path.lower().endswith(NO_REFERRER_SUFFIXES) or LOCKFILE_PATTERN.search(file_path))
+
+
+def reference_scope(file_path: str) -> re.Pattern | None:
+    """Path pattern limiting which files are searched, or None to search all."""
+    if Path(file_path).name == "Dockerfile":
+        return DOCKERFILE_REFERRERS
+    if file_path.endswith("docker-compose.yml"):
+        return COMPOSE_REFERRERS
+    return None
+
+
+def find_all_references(
+    file_paths: list[str], repo_root: str, limit: int = 20, max_bytes: int = SCAN_MAX_FILE_BYTES
+) -> dict[str, list[str]]:
+    """
+    Find up to `limit` files referencing each of file_paths, in one pass.
+    Walks the tree once, reading each file only if some still-pending
+    path's reference_scope() covers it, matching every such path's
+    pattern against it, and then dropping its contents. Stops early once
+    every path has reached the limit.
+    """
+    references = {file_path: [] for file_path in file_paths}
+    pending = {
+        file_path: (reference_pattern(file_path), reference_scope(file_path))
+        for file_path in references
+        if needs_reference_search(file_path)
+    }
+
+    for rel_path, full_path in iter_repo_files(repo_root):
+        if not pending:
+            break
+        searches = [
+            (file_path, pattern)
+            for file_path, (pattern, scope) in pending.items()
+            if file_path != rel_path and (scope is None or scope.match(rel_path))
+        ]
+        if not searches:
+            continue
+        try:
+            if os.path.getsize(full_path) > max_bytes:
+                continue
+            with open(full_path, "rb") as f:
+                data = f.read()
+        except OSError:
+            continue
 
-    # Strategy 5: For Docker files
-    if filename == "Dockerfile" or file_path.endswith("docker-compose.yml"):
-        references.update(grep_for_pattern("docker"))
-        references.update(grep_for_pattern("container"))
+        for file_path, pattern in searches:
+            if pattern.search(data):
+                found = references[file_path]
+                found.append(rel_path)
+                # Limit to avoid overwhelming
+                if len(found) >= limit:
+                    del pending[file_path]
+    return references
 
-    # Exclude self and normalize paths
-    normalized = set()
-    for ref in references:
-        rel_path = os.path.relpath(ref, repo_root) if os.path.isabs(ref) else ref
-        if rel_path != file_path and not rel_path.startswith(".git"):
-            normalized.add(rel_path)
 
-    return list(normalized)[:20]  # Limit to avoid overwhelming
+def find_references(file_path: str, repo_root: str, limit: int = 20) -> list[str]:
+    """Find up to `limit` files that reference the given file."""
+    return find_all_references([file_path], repo_root, limit)[file_path]
 
 
 def get_change_type(diff_file) -> str:
@@ -156,77 +266,109 @@ def get_change_type(diff_file) -> str:
         return "modified"
 
 
-def analyze_single_change(ai_client, diff_file, references: list[str], repo_root: str) -> ChangeImpact:
-    """
-    Analyze the impact of a single file change using AI.
-
-    Args:
-        ai_client: AI client with quick_query method
-        diff_file: DiffFile object with the change
-        references: List of files that reference this file
-        repo_root: Root directory of the repository
-
-    Returns:
-        ChangeImpact with analysis results
-    """
-    change_type = get_change_type(diff_file)
-
+def change_section(diff_file, references: list[str]) -> str:
+    """Build the IMPACT_CHANGE_SECTION describing one changed file."""
     # Format referencing files
     if references:
         ref_text = "\n".join(f"- {ref}" for ref in references[:10])
     else:
         ref_text = "(No direct references found)"
 
-    # Build the prompt
-    prompt = IMPACT_ANALYSIS_PROMPT.format(
+    return IMPACT_CHANGE_SECTION.format(
         file_path=diff_file.path,
-        change_type=change_type,
+        change_type=get_change_type(diff_file),
         diff_content=diff_file.content[:3000],  # Limit diff size
         referencing_files=ref_text,
     )
 
-    try:
-        response = ai_client.quick_query(prompt)
 
-        # Try to parse JSON response
+def build_impact_prompt(sections: list[str]) -> str:
+    """Build one impact analysis prompt for a group of change sections."""
+    changes = "\n\n".join(f"### Change {number}\n\n{section}" for number, section in enumerate(sections, 1))
+    return IMPACT_ANALYSIS_PROMPT.format(count=len(sections), changes=changes)
+
+
+def fallback_impact(diff_file, references: list[str]) -> ChangeImpact:
+    """Basic impact used when the AI analysis for a file isn't usable."""
+    return ChangeImpact(
+        file_path=diff_file.path,
+        change_summary=f"File {get_change_type(diff_file)}",
+        affected_areas=[],
+        potential_impacts=[],
+        review_focus=[],
+        related_files=references,
+    )
+
+
+def _text(value) -> str:
+    """Coerce a model-supplied field to a string (null becomes "")."""
+    if isinstance(value, str):
+        return value
+    return "" if value is None else str(value)
+
+
+def _text_list(value) -> list[str]:
+    """Coerce a model-supplied field to a list of strings (anything else becomes [])."""
+    if not isinstance(value, list):
+        return []
+    return [_text(item) for item in value if item is not None]
+
+
+def parse_impact_response(batch: list[tuple], response: str) -> list[dict | None]:
+    """
+    Parse a batched impact analysis response into one raw entry per file.
+    Files without an entry naming them get None.
+    """
+    try:
         # Handle markdown code fences if present
-        if "```json" in response:
-            response = response.split("```json")[1].split("```")[0]
-        elif "```" in response:
-            response = response.split("```")[1].split("```")[0]
-
-        data = json.loads(response.strip())
-
-        return ChangeImpact(
-            file_path=diff_file.path,
-            change_summary=data.get("change_summary", ""),
-            code_context=data.get("code_context", ""),
-            affected_areas=data.get("affected_areas", []),
-            potential_impacts=data.get("potential_impacts", []),
-            review_focus=data.get("review_focus", []),
-            related_files=references + data.get("critical_files", []),
-        )
-    except (json.JSONDecodeError, Exception) as e:
-        # Fallback to basic impact
-        print(f"Warning: Could not parse impact analysis for {diff_file.path}: {e}")
-        return ChangeImpact(
-            file_path=diff_file.path,
-            change_summary=f"File {change_type}",
-            affected_areas=[],
-            potential_impacts=[],
-            review_focus=[],
-            related_files=references,
-        )
+        match = CODE_FENCE_PATTERN.search(response)
+        entries = json_compat.loads(match.group(1) if match else response.strip()).get("impacts", [])
+        if not isinstance(entries, list):
+            raise ValueError("'impacts' is not a list")
+    except (json_compat.JSONDecodeError, Exception) as e:
+        print(f"Warning: Could not parse impact analysis for {', '.join(d.path for d, _ in batch)}: {e}")
+        return [None] * len(batch)
+
+    # Match entries to files by their "file" field, never by position: a
+    # skipped entry would otherwise shift every later file's analysis
+    by_file = {}
+    for data in entries:
+        if isinstance(data, dict) and isinstance(data.get("file"), str):
+            by_file.setdefault(data["file"], data)
+
+    results = []
+    for diff_file, _ in batch:
+        data = by_file.get(diff_file.path)
+        if data is None:
+            print(f"Warning: No impact analysis returned for {diff_file.path}")
+        results.append(data)
+    return results
+
+
+def impact_from_entry(diff_file, references: list[str], data: dict | None) -> ChangeImpact:
+    """Build a file's ChangeImpact from its analysis entry, or a basic one without it."""
+    if data is None:
+        return fallback_impact(diff_file, references)
+
+    # The model may return nulls or wrong types, so normalize every field
+    return ChangeImpact(
+        file_path=diff_file.path,
+        change_summary=_text(data.get("change_summary")),
+        code_context=_text(data.get("code_context")),
+        affected_areas=_text_list(data.get("affected_areas")),
+        potential_impacts=_text_list(data.get("potential_impacts")),
+        review_focus=_text_list(data.get("review_focus")),
+        related_files=references + _text_list(data.get("critical_files")),
+    )
 
 
 def load_file_preview(file_path: str, repo_root: str, max_lines: int = 60) -> str:
-    """Load a preview of a file (first N lines)."""
+    """Load a preview of a file (first N lines), without reading the rest."""
     full_path = Path(repo_root) / file_path
     try:
         if full_path.exists():
             with open(full_path) as f:
-                lines = f.readlines()[:max_lines]
-                return "".join(lines)
+                return "".join(islice(f, max_lines))
     except Exception:
         pass
     return ""
@@ -245,35 +387,36 @@ def select_context(
     context_files = []
     used_tokens = 0
 
-    # Collect all critical files from impact analysis
-    critical = set()
+    # Count how many impacts reference each related file
+    file_counts = Counter()
     for impact in impacts:
-        for f in impact.related_files:
-            # Only include files that exist and aren't already being changed
-            changed_paths = {i.file_path for i in impacts}
-            if f not in changed_paths:
-                critical.add(f)
+        file_counts.update(impact.related_files)
 
-    # Priority order: sort by how many impacts reference them
-    file_counts = {}
-    for impact in impacts:
-        for f in impact.related_files:
-            file_counts[f] = file_counts.get(f, 0) + 1
+    # Only include files that exist and aren't already being changed
+    changed_paths = {i.file_path for i in impacts}
+    critical = file_counts.keys() - changed_paths
 
-    sorted_files = sorted(critical, key=lambda f: file_counts.get(f, 0), reverse=True)
+    # Priority order: sort by how many impacts reference them
+    sorted_files = sorted(critical, key=file_counts.__getitem__, reverse=True)
 
-    for path in sorted_files:
-        content = load_file_preview(path, repo_root)
-        if not content:
-            continue
+    # Previews are independent reads, so load them in parallel; results
+    # still arrive in priority order
+    pool = ThreadPoolExecutor(max_workers=8)
+    try:
+        previews = pool.map(lambda path: (path, load_file_preview(path, repo_root)), sorted_files)
+        for path, content in previews:
+            if not content:
+                continue
 
-        tokens = estimate_tokens(content)
-        if used_tokens + tokens <= token_budget:
-            context_files.append((path, content))
-            used_tokens += tokens
+            tokens = estimate_tokens(content)
+            if used_tokens + tokens <= token_budget:
+                context_files.append((path, content))
+                used_tokens += tokens
 
-        if len(context_files) >= 10:  # Limit number of context files
-            break
+            if len(context_files) >= 10:  # Limit number of context files
+                break
+    finally:
+        pool.shutdown(cancel_futures=True)
 
     return context_files
 
@@ -301,10 +444,14 @@ def generate_project_overview(repo_root: str) -> str:
         "scripts",
     ]
 
-    existing_dirs = []
-    for d in common_dirs:
-        if (Path(repo_root) / d).exists():
-            existing_dirs.append(d)
+    # One directory read instead of a stat per candidate
+    try:
+        with os.scandir(repo_root) as it:
+            entries = {entry.name: entry for entry in it}
+    except OSError:
+        entries = {}
+
+    existing_dirs = [d for d in common_dirs if d in entries and entries[d].is_dir()]
 
     if existing_dirs:
         overview_parts.append("Project structure:")
@@ -322,10 +469,7 @@ def generate_project_overview(repo_root: str) -> str:
         "playbook.yml",
     ]
 
-    existing_files = []
-    for f in common_files:
-        if (Path(repo_root) / f).exists():
-            existing_files.append(f)
+    existing_files = [f for f in common_files if f in entries and entries[f].is_file()]
 
     if existing_files:
         overview_parts.append("Key files: " + ", ".join(existing_files))
@@ -342,7 +486,7 @@ def analyze_impacts(
     Args:
         diff_files: List of DiffFile objects from diff_parser
         repo_root: Root directory of the repository
-        ai_client: AI client with quick_query method
+        ai_client: AI client with quick_query_many method (and optional impact_cache)
         config: Config object with impact settings
 
     Returns:
@@ -351,23 +495,47 @@ def analyze_impacts(
     impacts = []
     all_critical_files = set()
 
-    # Limit the number of files to analyze
+    # Impact settings, read once up front
     max_files = getattr(config, "impact_max_files", 10)
-    files_to_analyze = diff_files[:max_files]
+    include_references = getattr(config, "impact_include_references", True)
+    max_concurrency = getattr(config, "impact_concurrency", 8)
+    token_budget = getattr(config, "impact_token_budget", 6000)
 
-    for diff in files_to_analyze:
-        # Skip binary files
-        if diff.is_binary:
-            continue
+    # Limit the number of files to analyze
+    files_to_analyze = diff_files[:max_files]
 
-        # Phase 1: Structural - what references this file?
-        if getattr(config, "impact_include_references", True):
-            references = find_references(diff.path, repo_root)
-        else:
-            references = []
+    # Skip binary files
+    text_files = [diff for diff in files_to_analyze if not diff.is_binary]
 
-        # Phase 2: Semantic - what's the impact of these specific changes?
-        impact = analyze_single_change(ai_client, diff, references, repo_root)
+    # Phase 1: Structural - what references each file? One streaming
+    # pass over the tree serves every changed file.
+    if include_references and text_files:
+        all_references = find_all_references([diff.path for diff in text_files], repo_root)
+    else:
+        all_references = {}
+    pending = [(diff, all_references.get(diff.path, [])) for diff in text_files]
+
+    # Phase 2: Semantic - what's the impact of these specific changes?
+    # Each file's analysis is cached under its own change section; the
+    # rest are analyzed IMPACT_BATCH_SIZE per call, with the calls run
+    # concurrently up to impact_concurrency at a time.
+    cache = getattr(ai_client, "impact_cache", None)
+    sections = [change_section(diff, references) for diff, references in pending]
+    entries = [cache.get(section) if cache else None for section in sections]
+
+    uncached = [i for i, entry in enumerate(entries) if entry is None]
+    batches = [uncached[i:i + IMPACT_BATCH_SIZE] for i in range(0, len(uncached), IMPACT_BATCH_SIZE)]
+    prompts = [build_impact_prompt([sections[i] for i in batch]) for batch in batches]
+    responses = asyncio.run(ai_client.quick_query_many(prompts, max_concurrency=max_concurrency))
+
+    for batch, response in zip(batches, responses):
+        for i, entry in zip(batch, parse_impact_response([pending[i] for i in batch], response)):
+            entries[i] = entry
+            if cache and entry is not None:
+                cache.set(sections[i], entry)
+
+    for (diff, references), entry in zip(pending, entries):
+        impact = impact_from_entry(diff, references, entry)
         impacts.append(impact)
 
         # Collect critical files
@@ -377,13 +545,11 @@ def analyze_impacts(
     project_overview = generate_project_overview(repo_root)
 
     # Select context within token budget
-    token_budget = getattr(config, "impact_token_budget", 6000)
     context_files = select_context(impacts, repo_root, token_budget)
 
     # Calculate total token estimate
     token_estimate = sum(estimate_tokens(content) for _, content in context_files)
-    for impact in impacts:
-        token_estimate += estimate_tokens(str(impact))
+    token_estimate += sum(impact.token_estimate for impact in impacts)
 
     return ImpactContext(
         impacts=impacts,
@@ -394,12 +560,12 @@ def analyze_impacts(
     )
 
 
-def format_impact_message(diff_text: str, impact_context: ImpactContext) -> str:
+def format_impact_message(diff_sections: Iterable[str], impact_context: ImpactContext) -> str:
     """
     Format the user message with impact analysis for the AI review.
 
     Args:
-        diff_text: Original diff text
+        diff_sections: Per-file diff sections, written as-is (blank-line separated)
         impact_context: ImpactContext with analysis
 
     Returns:
@@ -453,18 +619,24 @@ def format_impact_message(diff_text: str, impact_context: ImpactContext) -> str:
                 parts.append("... (truncated)")
             parts.append("```\n")
 
-    # The actual diff
+    # The actual diff, streamed into the message without joining it first
     parts.append("## Full Diff\n")
-    parts.append(diff_text)
+    message = io.StringIO()
+    message.write("\n".join(parts))
+    message.write("\n")
+    for i, section in enumerate(diff_sections):
+        if i:
+            message.write("\n\n")
+        message.write(section)
 
     # Review instructions
-    parts.append("\n## Review Instructions")
-    parts.append("1. For each change, verify the identified potential impacts")
-    parts.append("2. Check the 'Files to verify' actually handle the changes correctly")
-    parts.append("3. Look for impacts the analysis may have missed")
-    parts.append("4. Focus on the changed lines (+ and -) in the diff")
+    message.write("\n\n## Review Instructions\n")
+    message.write("1. For each change, verify the identified potential impacts\n")
+    message.write("2. Check the 'Files to verify' actually handle the changes correctly\n")
+    message.write("3. Look for impacts the analysis may have missed\n")
+    message.write("4. Focus on the changed lines (+ and -) in the diff")
 
-    return "\n".join(parts)
+    return message.getvalue()
 
 
 def get_change_type_label(impact: ChangeImpact) -> str:
@@ -0,0 +1,170 @@
+"""LLM response cache - Skip repeat API calls for identical review requests."""
+
+import hashlib
+import json
+import time
+from collections import OrderedDict
+from functools import wraps
+
+# Bump when the review response format changes to invalidate old entries
+CACHE_SCHEMA_VERSION = 1
+DEFAULT_TTL = 7 * 86400
+
+
+def cache_key(provider: str, model: str, system_prompt: str, user_message: str) -> str:
+    """Build a content-hash key for a review request."""
+    payload = {
+        "provider": provider,
+        "model": model,
+        "system_prompt": system_prompt,
+        "user_message": user_message,
+        "schema_version": CACHE_SCHEMA_VERSION,
+    }
+    return hashlib.sha256(json.dumps(payload, sort_keys=True).encode()).hexdigest()
+
+
+class LRUMemoryBackend:
+    """In-process LRU cache with per-entry expiry."""
+
+    def __init__(self, maxsize: int = 256):
+        self.maxsize = maxsize
+        self._data: OrderedDict[str, tuple[float | None, dict]] = OrderedDict()
+
+    def get(self, key: str) -> dict | None:
+        entry = self._data.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at is not None and expires_at < time.time():
+            del self._data[key]
+            return None
+        self._data.move_to_end(key)
+        return value
+
+    def set(self, key: str, value: dict, ttl: int | None = None) -> None:
+        expires_at = time.time() + ttl if ttl else None
+        self._data[key] = (expires_at, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def delete(self, key: str) -> None:
+        self._data.pop(key, None)
+
+    def clear(self) -> None:
+        self._data.clear()
+
+
+class DiskCacheBackend:
+    """On-disk cache (diskcache) that persists across runs when the directory is mounted."""
+
+    def __init__(self, directory: str):
+        import diskcache
+        self.cache = diskcache.Cache(directory)
+
+    def get(self, key: str) -> dict | None:
+        return self.cache.get(key)
+
+    def set(self, key: str, value: dict, ttl: int | None = None) -> None:
+        self.cache.set(key, value, expire=ttl)
+
+    def delete(self, key: str) -> None:
+        self.cache.delete(key)
+
+    def clear(self) -> None:
+        self.cache.clear()
+
+
+def create_backend(directory: str):
+    """Create the disk backend, falling back to memory if diskcache is unavailable."""
+    try:
+        return DiskCacheBackend(directory)
+    except (ImportError, OSError) as e:
+        print(f"Warning: disk cache unavailable ({e}), using in-memory cache")
+        return LRUMemoryBackend()
+
+
+class ReviewCache:
+    """Wraps an AI client's review methods with a content-hash cache."""
+
+    def __init__(self, backend, provider: str, model: str, ttl: int = DEFAULT_TTL, cacheable=None):
+        self.backend = backend
+        self.provider = provider
+        self.model = model
+        self.ttl = ttl
+        self.cacheable = cacheable or (lambda result: True)
+        self.hits = 0
+        self.misses = 0
+
+    def _lookup(self, system_prompt: str, user_message: str) -> tuple[str, dict | str | None]:
+        key = cache_key(self.provider, self.model, system_prompt, user_message)
+        result = self.backend.get(key)
+        if result is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return key, result
+
+    def _store(self, key: str, result: dict | str) -> None:
+        if self.cacheable(result):
+            self.backend.set(key, result, ttl=self.ttl)
+
+    def wrap(self, review):
+        """Cache a synchronous review(system_prompt, user_message) method."""
+        @wraps(review)
+        def cached_review(system_prompt: str, user_message: str) -> dict:
+            key, result = self._lookup(system_prompt, user_message)
+            if result is not None:
+                return result
+            result = review(system_prompt, user_message)
+            self._store(key, result)
+            return result
+        return cached_review
+
+    def wrap_async(self, review_async):
+        """Cache an async review_async(system_prompt, user_message) method."""
+        @wraps(review_async)
+        async def cached_review_async(system_prompt: str, user_message: str) -> dict:
+            key, result = self._lookup(system_prompt, user_message)
+            if result is not None:
+                return result
+            result = await review_async(system_prompt, user_message)
+            self._store(key, result)
+            return result
+        return cached_review_async
+
+    def install(self, client) -> None:
+        """Replace the client's review methods with cached versions."""
+        client.review = self.wrap(client.review)
+        client.review_async = self.wrap_async(client.review_async)
+        client.review_cache = self
+
+    def stats(self) -> str:
+        return f"LLM cache: {self.hits} hit(s), {self.misses} miss(es)"
+
+
+class ImpactCache(ReviewCache):
+    """
+    Caches impact analysis entries per changed file.
+    Keyed by that file's own prompt section (diff, references, change type),
+    so a file keeps its hit when other files analyzed alongside it change.
+    """
+
+    # Stands in for the system prompt in the key so entries never collide with
+    # reviews; versioned to drop entries stored before they were matched by file
+    KIND = "impact_entry/2"
+
+    def get(self, section: str) -> dict | None:
+        """Cached analysis entry for a change section, or None."""
+        return self._lookup(self.KIND, section)[1]
+
+    def set(self, section: str, entry: dict) -> None:
+        """Store the analysis entry parsed for a change section."""
+        self._store(cache_key(self.provider, self.model, self.KIND, section), entry)
+
+    def install(self, client) -> None:
+        """Attach to the client for analyze_impacts to use."""
+        client.impact_cache = self
+
+    def stats(self) -> str:
+        return f"Impact cache: {self.hits} hit(s), {self.misses} miss(es)"
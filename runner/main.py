@@ -1,27 +1,37 @@
 #!/usr/bin/env python3
 """AI Code Review - Entry point."""
 
+import asyncio
 import fnmatch
+import heapq
 import os
+import re
 import sys
 from pathlib import Path
 
 from config import load_config, Config
 from ai_client import create_client
+from batch_client import create_batch_client
 from gitea_client import GiteaClient
 from diff_parser import parse_diff
 from chunker import chunk_diff_files
 from impact_analyzer import analyze_impacts, format_impact_message
+import json_compat
 
 
-def should_ignore(filepath: str, patterns: list) -> bool:
+def compile_ignore_patterns(patterns: list) -> re.Pattern:
+    """
+    Combine ignore patterns into one regex.
+    Globs match the whole path; patterns ending in "/" also match as a path prefix.
+    """
+    alternatives = [fnmatch.translate(pattern) for pattern in patterns]
+    alternatives += [re.escape(pattern.rstrip("/")) for pattern in patterns if pattern.endswith("/")]
+    return re.compile("|".join(alternatives) or "(?!)")
+
+
+def should_ignore(filepath: str, matcher: re.Pattern) -> bool:
     """Check if file matches any ignore pattern."""
-    for pattern in patterns:
-        if fnmatch.fnmatch(filepath, pattern):
-            return True
-        if pattern.endswith("/") and filepath.startswith(pattern.rstrip("/")):
-            return True
-    return False
+    return matcher.match(filepath) is not None
 
 
 def load_prompt(impact_enabled: bool = False) -> str:
@@ -63,7 +73,8 @@ def main() -> int:
 
     # Parse and filter
     diff_files = parse_diff(diff_content)
-    diff_files = [f for f in diff_files if not should_ignore(f.path, config.ignore_patterns)]
+    ignore_matcher = compile_ignore_patterns(config.ignore_patterns)
+    diff_files = [f for f in diff_files if not should_ignore(f.path, ignore_matcher)]
 
     if not diff_files:
         print("No files to review after filtering")
@@ -91,34 +102,75 @@ def main() -> int:
     all_comments = []
     all_summaries = []
 
-    for i, chunk in enumerate(chunks):
-        print(f"Processing chunk {i+1}/{len(chunks)}")
-        diff_text = "\n\n".join(f"### {f.path}\n```diff\n{f.content}\n```" for f in chunk)
+    prompts = []
+    for chunk in chunks:
+        diff_sections = (f"### {f.path}\n```diff\n{f.content}\n```" for f in chunk)
 
         # Format message with or without impact context
         if impact_context and config.impact_analysis_enabled:
-            user_message = format_impact_message(diff_text, impact_context)
+            user_message = format_impact_message(diff_sections, impact_context)
         else:
-            user_message = f"Review these changes:\n\n{diff_text}"
-
-        result = ai.review(prompt, user_message)
+            user_message = "Review these changes:\n\n" + "\n\n".join(diff_sections)
+        prompts.append((prompt, user_message))
+
+    print(f"Processing {len(prompts)} chunk(s)")
+    if config.batch_mode and config.provider != "ollama":
+        # Submit all chunks as one discounted batch job; if the job itself
+        # fails, every chunk is reported as failed below
+        try:
+            results = create_batch_client(ai, config).review_all(prompts)
+        except Exception as e:
+            results = [e] * len(prompts)
+    else:
+        # Review all chunks concurrently; chunk_diff_files already packs the
+        # diff files into as few requests as fit
+        results = asyncio.run(ai.review_all(prompts, max_concurrency=config.ai_concurrency))
+
+    failed = 0
+    for i, result in enumerate(results):
+        if isinstance(result, Exception):
+            print(f"Chunk {i+1}/{len(results)} failed: {result}")
+            failed += 1
+            continue
         all_comments.extend(result.get("inline_comments", []))
         if result.get("summary"):
             all_summaries.append(result["summary"])
 
+    if getattr(ai, "review_cache", None):
+        print(ai.review_cache.stats())
+    if getattr(ai, "impact_cache", None):
+        print(ai.impact_cache.stats())
+
+    if failed == len(results):
+        print("Error: all review chunks failed")
+        return 1
+    if failed:
+        # Post what was reviewed, but say so up front and fail the run below
+        print(f"Warning: {failed}/{len(results)} review chunk(s) failed; review is incomplete")
+        all_summaries.insert(0, {
+            "overview": f"⚠️ Review incomplete: {failed} of {len(results)} chunk(s) of this diff could not be reviewed.",
+            "strengths": [],
+            "issues": [],
+            "suggestions": [],
+        })
+
     # Limit comments by severity
     if len(all_comments) > config.max_comments:
         order = {"critical": 0, "error": 1, "warning": 2, "info": 3}
-        all_comments.sort(key=lambda c: order.get(c.get("severity", "info"), 3))
-        all_comments = all_comments[:config.max_comments]
+        # Same result as a stable sort + slice, without sorting the whole list
+        all_comments = heapq.nsmallest(
+            config.max_comments, all_comments, key=lambda c: order.get(c.get("severity", "info"), 3)
+        )
 
     # Post to Gitea
     if gitea_token and repo_name and pr_number:
         gitea = GiteaClient(config, gitea_token)
         gitea.post_review(repo_name, int(pr_number), all_comments, all_summaries, impact_context)
     else:
-        import json
-        print(json.dumps({"comments": all_comments, "summaries": all_summaries}, indent=2))
+        # Write the encoded bytes directly; flush first so earlier prints stay in order
+        sys.stdout.flush()
+        sys.stdout.buffer.write(json_compat.dumps({"comments": all_comments, "summaries": all_summaries}, indent=True))
+        sys.stdout.buffer.write(b"\n")
 
     # Check fail threshold
     order = {"critical": 0, "error": 1, "warning": 2, "info": 3}
@@ -128,6 +180,10 @@ def main() -> int:
             print(f"Found {c['severity']} issue - failing")
             return 1
 
+    if failed:
+        print("Review incomplete - failing")
+        return 1
+
     print("Review completed")
     return 0
 
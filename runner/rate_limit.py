@@ -0,0 +1,70 @@
+"""Rate limiting - Keep concurrent AI requests under provider RPM/TPM limits."""
+
+import asyncio
+import time
+
+
+class AsyncTokenBucket:
+    """
+    Token-bucket limiter for requests per minute and tokens per minute.
+    Either limit can be 0 to disable it. Callers wait in FIFO order, so a
+    burst of gathered requests is spread out instead of tripping 429s.
+    """
+
+    def __init__(self, rpm: int, tpm: int):
+        self.rpm = rpm
+        self.tpm = tpm
+        self._requests = float(rpm)
+        self._tokens = float(tpm)
+        self._last = time.monotonic()
+        self._lock = None
+        self._lock_loop = None
+
+    def _get_lock(self) -> asyncio.Lock:
+        """asyncio.Lock is bound to one event loop, so keep one per loop."""
+        loop = asyncio.get_running_loop()
+        if self._lock is None or self._lock_loop is not loop:
+            self._lock = asyncio.Lock()
+            self._lock_loop = loop
+        return self._lock
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        elapsed = now - self._last
+        self._last = now
+        if self.rpm:
+            self._requests = min(self.rpm, self._requests + elapsed * self.rpm / 60)
+        if self.tpm:
+            self._tokens = min(self.tpm, self._tokens + elapsed * self.tpm / 60)
+
+    def _wait_time(self, tokens: int) -> float:
+        wait = 0.0
+        if self.rpm and self._requests < 1:
+            wait = max(wait, (1 - self._requests) * 60 / self.rpm)
+        if self.tpm and self._tokens < tokens:
+            wait = max(wait, (tokens - self._tokens) * 60 / self.tpm)
+        return wait
+
+    async def acquire(self, tokens: int = 0) -> None:
+        """Wait until one request of `tokens` tokens fits in both budgets."""
+        # A request larger than the whole per-minute budget would wait forever
+        if self.tpm:
+            tokens = min(tokens, self.tpm)
+
+        async with self._get_lock():
+            self._refill()
+            wait = self._wait_time(tokens)
+            if wait > 0:
+                await asyncio.sleep(wait)
+                self._refill()
+            if self.rpm:
+                self._requests -= 1
+            if self.tpm:
+                self._tokens -= tokens
+
+
+def create_rate_limiter(rpm: int, tpm: int) -> AsyncTokenBucket | None:
+    """Create a limiter, or None when both limits are disabled."""
+    if not rpm and not tpm:
+        return None
+    return AsyncTokenBucket(rpm, tpm)
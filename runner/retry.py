@@ -0,0 +1,156 @@
+"""Retry policy - Back off and retry transient AI provider and Gitea failures."""
+
+import time
+from email.utils import parsedate_to_datetime
+
+from tenacity import retry, retry_if_exception, stop_after_attempt, wait_random_exponential
+
+MAX_ATTEMPTS = 5
+MAX_WAIT = 30
+
+# Rate limited, timed out, or server-side failures worth retrying
+# (529 is Anthropic's "overloaded")
+TRANSIENT_STATUS_CODES = {408, 429, 500, 502, 503, 504, 529}
+
+# Statuses that mean the server did not act on the request, so even a
+# non-idempotent POST can be resent without risking a duplicate
+NOT_PROCESSED_STATUS_CODES = {429, 503}
+
+
+def _connection_errors() -> tuple[type[Exception], ...]:
+    """Connection/timeout exception types from whichever HTTP libraries are installed."""
+    errors: list[type[Exception]] = []
+    try:
+        import requests
+        errors += [requests.ConnectionError, requests.Timeout]
+    except ImportError:
+        pass
+    try:
+        import httpx
+        errors.append(httpx.TransportError)
+    except ImportError:
+        pass
+    try:
+        import openai
+        errors.append(openai.APIConnectionError)  # Includes APITimeoutError
+    except ImportError:
+        pass
+    try:
+        import anthropic
+        errors.append(anthropic.APIConnectionError)
+    except ImportError:
+        pass
+    return tuple(errors)
+
+
+CONNECTION_ERRORS = _connection_errors()
+
+
+def _status_code(exc: BaseException) -> int | None:
+    """HTTP status of an SDK/requests/httpx error, if it carries one."""
+    code = getattr(exc, "status_code", None)
+    if code is None:
+        code = getattr(getattr(exc, "response", None), "status_code", None)
+    return code
+
+
+def is_transient(exc: BaseException) -> bool:
+    """True for errors a retry can reasonably fix."""
+    if CONNECTION_ERRORS and isinstance(exc, CONNECTION_ERRORS):
+        return True
+    return _status_code(exc) in TRANSIENT_STATUS_CODES
+
+
+def is_unsent(exc: BaseException) -> bool:
+    """
+    True when a requests call failed before the server could process it:
+    the connection was never established, or the server refused the work.
+    """
+    try:
+        import requests
+        from urllib3.exceptions import NewConnectionError
+    except ImportError:
+        return False
+    if isinstance(exc, requests.ConnectTimeout):
+        return True
+    if isinstance(exc, requests.ConnectionError):
+        reason = getattr(exc.args[0] if exc.args else None, "reason", None)
+        return isinstance(reason, NewConnectionError)
+    return _status_code(exc) in NOT_PROCESSED_STATUS_CODES
+
+
+def is_unsubmitted(exc: BaseException) -> bool:
+    """
+    True when a provider SDK call failed before the provider could act on
+    it: the connection was never established, or it was rate limited (429).
+    """
+    if _status_code(exc) == 429:
+        return True
+    try:
+        import httpx
+    except ImportError:
+        return False
+    # The SDKs wrap the underlying httpx error in their APIConnectionError
+    cause = exc if isinstance(exc, httpx.TransportError) else exc.__cause__
+    return isinstance(cause, (httpx.ConnectError, httpx.ConnectTimeout))
+
+
+def _retry_after_seconds(exc: BaseException) -> float | None:
+    """Seconds requested by a Retry-After header (delta or HTTP date) on the error's response."""
+    headers = getattr(getattr(exc, "response", None), "headers", None)
+    value = headers.get("retry-after") if headers is not None else None
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+class wait_retry_after:
+    """Honor the server's Retry-After header, else fall back to another wait strategy."""
+
+    def __init__(self, fallback):
+        self.fallback = fallback
+
+    def __call__(self, retry_state) -> float:
+        delay = _retry_after_seconds(retry_state.outcome.exception())
+        if delay is not None:
+            return min(delay, MAX_WAIT)
+        return self.fallback(retry_state)
+
+
+def _log_retry(retry_state) -> None:
+    exc = retry_state.outcome.exception()
+    print(
+        f"Transient error in {retry_state.fn.__name__} ({exc}), "
+        f"retrying in {retry_state.next_action.sleep:.1f}s "
+        f"(attempt {retry_state.attempt_number}/{MAX_ATTEMPTS})"
+    )
+
+
+def _retrying(predicate):
+    """Retry decorator for sync or async functions that make one external call."""
+    return retry(
+        stop=stop_after_attempt(MAX_ATTEMPTS),
+        wait=wait_retry_after(wait_random_exponential(multiplier=1, max=MAX_WAIT)),
+        retry=retry_if_exception(predicate),
+        before_sleep=_log_retry,
+        reraise=True,
+    )
+
+
+# For idempotent calls: GETs, and provider review/query requests, which
+# create nothing that a resend could duplicate
+with_retries = _retrying(is_transient)
+
+# For non-idempotent Gitea requests: only resend what the server never processed
+with_unsent_retries = _retrying(is_unsent)
+
+# For provider calls that create (and bill) something, like a batch job:
+# only resend what never reached the provider or was rate limited
+with_unsubmitted_retries = _retrying(is_unsubmitted)